@@ -4,64 +4,72 @@ Generate golden test data for validating the Go MPM implementation.
 This creates JSON files with input signals and expected outputs.
 """
 
-import json
 import numpy as np
+import orjson
 from mpm import normalized_square_difference
 
 
-def generate_sine_wave(frequency, duration, sample_rate):
-    """Generate a sine wave signal."""
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-    return np.sin(2 * np.pi * frequency * t)
+def time_vector(duration, sample_rate):
+    """Generate the sample time stamps for a signal."""
+    return np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
+
+
+def generate_sine_wave(frequency, t):
+    """Generate a sine wave signal sampled at the time stamps t."""
+    signal = np.multiply(2 * np.pi * frequency, t)
+    return np.sin(signal, out=signal)
 
 
 def main():
     test_cases = []
 
+    # Time stamps shared by all 0.1s test signals
+    t_long = time_vector(0.1, 48000)
+
     # Test case 1: Simple 440Hz sine wave
-    signal_440 = generate_sine_wave(440, 0.1, 48000)
+    signal_440 = generate_sine_wave(440, t_long)
     nsdf_440 = normalized_square_difference(signal_440)
 
     test_cases.append({
         "name": "440Hz sine wave",
-        "input": signal_440.tolist(),
-        "expected_nsdf": nsdf_440.tolist(),
+        "input": signal_440,
+        "expected_nsdf": nsdf_440,
         "sample_rate": 48000,
         "frequency": 440
     })
 
     # Test case 2: Lower frequency 220Hz
-    signal_220 = generate_sine_wave(220, 0.1, 48000)
+    signal_220 = generate_sine_wave(220, t_long)
     nsdf_220 = normalized_square_difference(signal_220)
 
     test_cases.append({
         "name": "220Hz sine wave",
-        "input": signal_220.tolist(),
-        "expected_nsdf": nsdf_220.tolist(),
+        "input": signal_220,
+        "expected_nsdf": nsdf_220,
         "sample_rate": 48000,
         "frequency": 220
     })
 
     # Test case 3: Higher frequency 880Hz
-    signal_880 = generate_sine_wave(880, 0.1, 48000)
+    signal_880 = generate_sine_wave(880, t_long)
     nsdf_880 = normalized_square_difference(signal_880)
 
     test_cases.append({
         "name": "880Hz sine wave",
-        "input": signal_880.tolist(),
-        "expected_nsdf": nsdf_880.tolist(),
+        "input": signal_880,
+        "expected_nsdf": nsdf_880,
         "sample_rate": 48000,
         "frequency": 880
     })
 
     # Test case 4: Small buffer
-    signal_small = generate_sine_wave(440, 0.01, 48000)
+    signal_small = generate_sine_wave(440, time_vector(0.01, 48000))
     nsdf_small = normalized_square_difference(signal_small)
 
     test_cases.append({
         "name": "small buffer",
-        "input": signal_small.tolist(),
-        "expected_nsdf": nsdf_small.tolist(),
+        "input": signal_small,
+        "expected_nsdf": nsdf_small,
         "sample_rate": 48000,
         "frequency": 440
     })
@@ -73,8 +81,11 @@ def main():
         "test_cases": test_cases
     }
 
-    with open("testdata/nsdf_golden.json", "w") as f:
-        json.dump(output, f, indent=2)
+    # orjson serializes the ndarrays directly, without .tolist() round trips
+    with open("testdata/nsdf_golden.json", "wb") as f:
+        f.write(orjson.dumps(
+            output, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_INDENT_2
+        ))
 
     print(f"Generated {len(test_cases)} test cases")
     print("Saved to testdata/nsdf_golden.json")
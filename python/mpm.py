@@ -8,10 +8,24 @@ The MPM algorithm uses a modified autocorrelation function called NSDF
 (Normalized Square Difference Function) to detect pitch with high accuracy.
 """
 
+from functools import lru_cache
+
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.fft import irfft, next_fast_len, rfft
+
+# Number of frames detect_pitch_mpm transforms per batched NSDF call
+_BATCH_FRAMES = 256
+
 
+@lru_cache(maxsize=None)
+def _fft_size(frame_length):
+    """FFT length for the NSDF of frames with frame_length samples."""
+    # Smallest 2/3/5-smooth length that avoids circular wrap-around
+    return next_fast_len(2 * frame_length - 1)
 
-def normalized_square_difference(audio_buffer):
+
+def normalized_square_difference(audio_buffer, fft_size=None):
     """
     Calculate the Normalized Square Difference Function (NSDF).
 
@@ -28,37 +42,84 @@ def normalized_square_difference(audio_buffer):
     Parameters
     ----------
     audio_buffer : np.ndarray
-        Audio signal buffer (1D array)
+        Audio signal buffer (1D array), or a 2D array of equally sized
+        frames (one per row) to process in a single batch
+    fft_size : int, optional
+        FFT length to use, at least 2 * n - 1 for frames of n samples.
+        Computed from the frame length if not given; callers processing
+        many equally sized frames can pass it in once.
 
     Returns
     -------
     nsdf : np.ndarray
-        Normalized square difference function values
+        Normalized square difference function values, with the same
+        shape as audio_buffer. float32 input stays in single precision.
+
+    Raises
+    ------
+    ValueError
+        If fft_size is smaller than 2 * n - 1, which would wrap the
+        autocorrelation around
     """
-    n = len(audio_buffer)
+    audio_buffer = np.asarray(audio_buffer)
+    n = audio_buffer.shape[-1]
 
     # Calculate autocorrelation using FFT (efficient O(N log N))
-    # Pad to next power of 2 for FFT efficiency
-    fft_size = 2 ** int(np.ceil(np.log2(2 * n)))
+    # Pad to the smallest 2/3/5-smooth length that avoids circular wrap-around
+    if fft_size is None:
+        fft_size = _fft_size(n)
+    elif fft_size < 2 * n - 1:
+        raise ValueError(
+            f"fft_size must be at least 2 * n - 1 = {2 * n - 1} for frames "
+            f"of {n} samples, got {fft_size}"
+        )
 
-    # Compute autocorrelation via FFT
-    fft = np.fft.rfft(audio_buffer, n=fft_size)
-    autocorr = np.fft.irfft(fft * np.conj(fft))[:n]
+    return _nsdf_batch(audio_buffer, fft_size)
 
-    # Calculate m(tau) = sum of squared samples for each lag
-    # m(tau) = sum(x[j]^2) + sum(x[j+tau]^2) for j in valid range
-    cumsum_sq = np.concatenate(([0], np.cumsum(audio_buffer ** 2)))
 
-    m = np.zeros(n)
-    for tau in range(n):
-        # m(tau) = sum(x[0:n-tau]^2) + sum(x[tau:n]^2)
-        m[tau] = cumsum_sq[n - tau] + (cumsum_sq[n] - cumsum_sq[tau])
+def _nsdf_batch(audio_buffer, fft_size, workers=None, squared=None):
+    """
+    NSDF along the last axis of audio_buffer with a fixed fft_size.
 
-    # Avoid division by zero
-    m[m == 0] = 1e-10
+    workers is passed to scipy.fft. squared, if given, must equal
+    audio_buffer ** 2; detect_pitch_mpm passes a strided view of the
+    squared audio so overlapping frames are not squared repeatedly.
+    """
+    n = audio_buffer.shape[-1]
+
+    # Compute autocorrelation via FFT
+    # |X|^2 is real, so skip the complex multiply by the conjugate
+    fft = rfft(audio_buffer, n=fft_size, axis=-1, workers=workers)
+    power = np.square(fft.real)
+    power += np.square(fft.imag)
+    autocorr = irfft(power, n=fft_size, axis=-1, workers=workers)[..., :n]
 
-    # Calculate NSDF: nsdf(tau) = 2 * r(tau) / m(tau)
-    nsdf = 2 * autocorr / m
+    # Calculate m(tau) = sum of squared samples for each lag
+    # m(tau) = sum(x[j]^2) + sum(x[j+tau]^2) for j in valid range
+    # (accumulated in float64, since the prefix differences below cancel)
+    cumsum_sq = np.empty(audio_buffer.shape[:-1] + (n + 1,))
+    cumsum_sq[..., 0] = 0
+    if squared is None:
+        squared = np.square(audio_buffer)
+    np.cumsum(squared, axis=-1, dtype=np.float64, out=cumsum_sq[..., 1:])
+
+    # m(tau) = sum(x[0:n-tau]^2) + sum(x[tau:n]^2), for all tau at once:
+    # the tail sums from a forward slice, then the head sums from a
+    # reversed slice added in place
+    m = cumsum_sq[..., n:] - cumsum_sq[..., :n]
+    m += cumsum_sq[..., n:0:-1]
+    m = m.astype(autocorr.dtype, copy=False)
+
+    # Avoid division by zero, and by m(tau) so small next to the frame
+    # energy m(0) that FFT round-off (~eps * m(0)) would dominate r(tau);
+    # this matters for float32, where eps is about 1e-7
+    floor = 100 * np.finfo(m.dtype).eps * m[..., :1]
+    np.maximum(floor, 1e-10, out=floor)
+    np.maximum(m, floor, out=m)
+
+    # Calculate NSDF: nsdf(tau) = 2 * r(tau) / m(tau), in place in m's buffer
+    nsdf = np.divide(autocorr, m, out=m)
+    nsdf *= 2
 
     return nsdf
 
@@ -84,17 +145,39 @@ def peak_picking(nsdf, threshold=0.1):
     peaks : list of tuples
         List of (index, value) for each detected peak
     """
-    peaks = []
+    indices, values = _peak_picking(nsdf, threshold)
+    return list(zip(indices.tolist(), values.tolist()))
+
+
+def _peak_picking(nsdf, threshold, stop_above=None):
+    """
+    Array form of peak_picking, returning (indices, values).
+
+    If stop_above is given and the first peak reaches it, only that peak
+    is returned.
+    """
+    # Not scipy.signal.find_peaks: it also reports plateau midpoints, which
+    # the Go port does not treat as peaks, and needs a second pass for the
+    # strict threshold, making it slower than this single mask.
 
     # Start from lag=1 to avoid the trivial peak at lag=0
-    for i in range(1, len(nsdf) - 1):
-        # Check if it's a positive peak above threshold
-        if nsdf[i] > threshold and nsdf[i] > 0:
-            # Check if it's a local maximum
-            if nsdf[i] > nsdf[i - 1] and nsdf[i] > nsdf[i + 1]:
-                peaks.append((i, nsdf[i]))
+    center = nsdf[1:-1]
+
+    # Positive peak above threshold that is also a local maximum
+    mask = center > max(threshold, 0)
+    mask &= center > nsdf[:-2]
+    mask &= center > nsdf[2:]
+
+    # The mask above is still built over the whole NSDF; a strong first
+    # peak only skips flatnonzero and the gather of every later peak
+    # (argmax on a boolean mask stops at the first True)
+    if stop_above is not None and center.size:
+        first = int(np.argmax(mask))
+        if mask[first] and center[first] >= stop_above:
+            return np.array([first + 1]), center[first:first + 1]
 
-    return peaks
+    indices = np.flatnonzero(mask) + 1
+    return indices, nsdf[indices]
 
 
 def parabolic_interpolation(nsdf, peak_index):
@@ -136,7 +219,50 @@ def parabolic_interpolation(nsdf, peak_index):
     return peak_index + offset
 
 
-def mpm_pitch_detection(audio_buffer, sample_rate, threshold=0.1):
+def parabolic_interpolation_batch(nsdf, peak_indices):
+    """
+    Vectorized parabolic_interpolation over many peaks at once.
+
+    Parameters
+    ----------
+    nsdf : np.ndarray
+        Normalized square difference function (1D) shared by all peaks,
+        or a 2D array with one NSDF row per entry of peak_indices
+    peak_indices : np.ndarray
+        Integer indices of the peaks
+
+    Returns
+    -------
+    refined_indices : np.ndarray
+        Refined peak locations (can be fractional)
+    """
+    peak_indices = np.asarray(peak_indices)
+    n = nsdf.shape[-1]
+
+    # Get the three points around each peak (clipped so edge peaks can be
+    # gathered; their offset is discarded below)
+    neighbours = np.clip(peak_indices[..., None] + np.array([-1, 0, 1]),
+                         0, n - 1)
+    if nsdf.ndim == 1:
+        points = nsdf[neighbours]
+    else:
+        points = np.take_along_axis(nsdf, neighbours, axis=-1)
+    alpha, beta, gamma = points[..., 0], points[..., 1], points[..., 2]
+
+    denominator = alpha - 2 * beta + gamma
+
+    # Leave edge peaks and flat parabolas unrefined, as the scalar version
+    usable = (peak_indices > 0) & (peak_indices < n - 1)
+    usable &= np.abs(denominator) >= 1e-10
+
+    offset = np.zeros(denominator.shape, dtype=denominator.dtype)
+    np.divide(0.5 * (alpha - gamma), denominator, out=offset, where=usable)
+
+    return peak_indices + offset
+
+
+def mpm_pitch_detection(audio_buffer, sample_rate, threshold=0.1,
+                        fft_size=None):
     """
     Detect pitch using the McLeod Pitch Method (MPM).
 
@@ -157,6 +283,9 @@ def mpm_pitch_detection(audio_buffer, sample_rate, threshold=0.1):
         Detection threshold (0 to 1), default 0.1
         Higher = more conservative (fewer false positives)
         Lower = more sensitive (may detect noise)
+    fft_size : int, optional
+        FFT length passed through to normalized_square_difference
+        (at least 2 * len(audio_buffer) - 1)
 
     Returns
     -------
@@ -166,49 +295,61 @@ def mpm_pitch_detection(audio_buffer, sample_rate, threshold=0.1):
         Confidence/clarity of detection (0 to 1), or None if no pitch
     """
     # Step 1: Calculate NSDF
-    nsdf = normalized_square_difference(audio_buffer)
+    nsdf = normalized_square_difference(audio_buffer, fft_size)
 
-    # Step 2: Find peaks above threshold
-    peaks = peak_picking(nsdf, threshold)
+    # Steps 2-3: Find peaks above threshold and select the best one
+    peak_index, clarity = _select_peak(nsdf, threshold)
 
-    if not peaks:
+    if peak_index is None:
         return None, None
 
-    # Step 3: Select the best peak
-    # For musical signals, the first peak (lowest lag) with high clarity
-    # is usually the fundamental frequency. Harmonics appear at higher lags.
-    first_peak_index, first_peak_clarity = peaks[0]
-
-    # If first peak has strong clarity, use it (fundamental frequency)
-    # Otherwise, find the peak with maximum clarity
-    strong_clarity_threshold = 0.8
-    if first_peak_clarity >= strong_clarity_threshold:
-        best_peak = peaks[0]
-    else:
-        best_peak = max(peaks, key=lambda p: p[1])
-
-    peak_index, clarity = best_peak
-
     # Step 4: Refine peak location with parabolic interpolation
     refined_lag = parabolic_interpolation(nsdf, peak_index)
 
     # Step 5: Convert lag to frequency
     # frequency = sample_rate / period (in samples)
+    # (as a Python float, so float32 input does not leak np.float32 out)
     if refined_lag > 0:
-        frequency = sample_rate / refined_lag
+        frequency = float(sample_rate / refined_lag)
     else:
         return None, None
 
     return frequency, clarity
 
 
+def _select_peak(nsdf, threshold):
+    """Steps 2-3 of mpm_pitch_detection: (peak_index, clarity) or Nones."""
+    # For musical signals, the first peak (lowest lag) with high clarity
+    # is usually the fundamental frequency. Harmonics appear at higher lags.
+    strong_clarity_threshold = 0.8
+
+    # Step 2: Find peaks above threshold, stopping at a strong first peak
+    peak_indices, peak_values = _peak_picking(
+        nsdf, threshold, stop_above=strong_clarity_threshold
+    )
+
+    if len(peak_indices) == 0:
+        return None, None
+
+    # Step 3: Select the best peak
+    # If first peak has strong clarity, use it (fundamental frequency)
+    # Otherwise, find the peak with maximum clarity
+    if peak_values[0] >= strong_clarity_threshold:
+        best = 0
+    else:
+        best = int(np.argmax(peak_values))
+
+    return int(peak_indices[best]), float(peak_values[best])
+
+
 def detect_pitch_mpm(audio, sample_rate, frame_length=2048, hop_length=512,
-                     threshold=0.1, fmin=50, fmax=2000):
+                     threshold=0.1, fmin=50, fmax=2000, workers=-1):
     """
     Detect pitch over time using MPM with a sliding window.
 
     This function processes the audio in overlapping frames and
-    detects pitch for each frame independently.
+    detects pitch for each frame independently. The NSDF is computed
+    in float32 for a batch of frames at a time to share the FFT work.
 
     Parameters
     ----------
@@ -226,6 +367,8 @@ def detect_pitch_mpm(audio, sample_rate, frame_length=2048, hop_length=512,
         Minimum frequency to consider (Hz)
     fmax : float
         Maximum frequency to consider (Hz)
+    workers : int
+        Number of threads for the batched FFTs (-1 for all CPUs)
 
     Returns
     -------
@@ -236,30 +379,60 @@ def detect_pitch_mpm(audio, sample_rate, frame_length=2048, hop_length=512,
     times : np.ndarray
         Time stamps for each frame in seconds
     """
-    # Calculate number of frames
-    num_frames = 1 + (len(audio) - frame_length) // hop_length
+    # Calculate number of frames (none if the audio is shorter than a frame)
+    num_frames = max(0, 1 + (len(audio) - frame_length) // hop_length)
 
     pitches = np.full(num_frames, np.nan)
     clarities = np.full(num_frames, np.nan)
-    times = np.zeros(num_frames)
-
-    for i in range(num_frames):
-        # Extract frame
-        start = i * hop_length
-        end = start + frame_length
-        frame = audio[start:end]
-
-        # Calculate time stamp for this frame
-        times[i] = start / sample_rate
-
-        # Detect pitch for this frame
-        freq, clarity = mpm_pitch_detection(frame, sample_rate, threshold)
+    times = np.arange(num_frames) * hop_length / sample_rate
+
+    if num_frames == 0:
+        return pitches, clarities, times
+
+    # All frames share one length, so the FFT size (and scipy.fft's cached
+    # plan for it) is the same for every hop
+    fft_size = _fft_size(frame_length)
+
+    # Single precision is plenty for pitch tracking and halves the bytes
+    # moved through the FFTs
+    audio = np.asarray(audio, dtype=np.float32)
+
+    # Strided view of all frames (no copy): frames[i] = audio[i*hop:i*hop+len]
+    frames = sliding_window_view(audio, frame_length)[::hop_length]
+
+    # Overlapping frames share samples, so square the audio once and view
+    # it the same way rather than squaring every frame
+    audio_sq = np.square(audio)
+    frames_sq = sliding_window_view(audio_sq, frame_length)[::hop_length]
+
+    # Compute the NSDF in fixed-size batches to bound memory on long audio
+    for batch_start in range(0, num_frames, _BATCH_FRAMES):
+        batch = slice(batch_start, batch_start + _BATCH_FRAMES)
+        nsdf_batch = _nsdf_batch(
+            frames[batch], fft_size, workers, squared=frames_sq[batch]
+        )
+
+        # Select the best peak in each frame; frames without one keep
+        # index 0, which refines to lag 0 and is dropped below
+        peak_indices = np.zeros(len(nsdf_batch), dtype=np.intp)
+        peak_clarities = np.zeros(len(nsdf_batch))
+        for j, nsdf in enumerate(nsdf_batch):
+            peak_index, clarity = _select_peak(nsdf, threshold)
+            if peak_index is not None:
+                peak_indices[j] = peak_index
+                peak_clarities[j] = clarity
+
+        # Refine all peaks and convert lag to frequency in one pass
+        refined_lags = parabolic_interpolation_batch(nsdf_batch, peak_indices)
+        found = refined_lags > 0
+        freqs = np.divide(sample_rate, refined_lags, where=found,
+                          out=np.zeros(len(refined_lags)))
 
         # Filter based on frequency range
-        if freq is not None:
-            if fmin <= freq <= fmax:
-                pitches[i] = freq
-                clarities[i] = clarity
+        keep = found & (freqs >= fmin) & (freqs <= fmax)
+        frame_indices = batch_start + np.flatnonzero(keep)
+        pitches[frame_indices] = freqs[keep]
+        clarities[frame_indices] = peak_clarities[keep]
 
     return pitches, clarities, times
 
@@ -301,11 +474,12 @@ def get_dominant_pitch_mpm(pitches, clarities=None, min_clarity=0.5):
     if clarities is not None:
         valid_clarities = clarities[valid_mask]
         # Weighted median: sort by pitch, use cumulative clarity weights
+        # (only the weights are gathered; the median pitch is looked up
+        # through the sort order instead of materializing a sorted copy)
         sort_idx = np.argsort(valid_pitches)
-        sorted_pitches = valid_pitches[sort_idx]
-        sorted_weights = valid_clarities[sort_idx]
-        cumsum = np.cumsum(sorted_weights)
+        cumsum = np.cumsum(valid_clarities[sort_idx])
         median_idx = np.searchsorted(cumsum, cumsum[-1] / 2)
-        return sorted_pitches[median_idx]
+        return valid_pitches[sort_idx[median_idx]]
     else:
+        # np.median selects via np.partition, O(K) rather than a full sort
         return np.median(valid_pitches)
@@ -1,6 +1,6 @@
 """Pitch conversion utilities - minimal version for MPM testing."""
 
-import numpy as np
+import math
 
 
 def pitch_to_note(frequency):
@@ -25,8 +25,8 @@ def pitch_to_note(frequency):
         return None, None, None
 
     # A4 = 440 Hz = MIDI note 69
-    midi_number = 69 + 12 * np.log2(frequency / 440.0)
-    midi_number_rounded = int(round(midi_number))
+    midi_number = 69 + 12 * math.log2(frequency / 440.0)
+    midi_number_rounded = round(midi_number)
 
     # Calculate cents offset from nearest note
     cents_offset = 100 * (midi_number - midi_number_rounded)
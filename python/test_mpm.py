@@ -5,7 +5,7 @@ This is the reference implementation for comparing with Go port.
 """
 
 import numpy as np
-from mpm import mpm_pitch_detection
+from mpm import detect_pitch_mpm, mpm_pitch_detection
 from pitch_utils import pitch_to_note
 
 
@@ -22,10 +22,17 @@ def generate_guitar_tone(frequency, duration=1.0, sample_rate=48000,
     t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
     signal = np.zeros_like(t)
 
+    # Fundamental phase, scaled per harmonic into a reused buffer
+    phase = (2 * np.pi * frequency) * t
+    harmonic = np.empty_like(t)
+
     # Add fundamental and harmonics with decreasing amplitude
     for n in range(1, num_harmonics + 1):
         harmonic_amp = amplitude / n
-        signal += harmonic_amp * np.sin(2 * np.pi * frequency * n * t)
+        np.multiply(phase, n, out=harmonic)
+        np.sin(harmonic, out=harmonic)
+        harmonic *= harmonic_amp
+        signal += harmonic
 
     # Simple envelope
     envelope = np.ones_like(t)
@@ -74,6 +81,34 @@ def test_single_frequency(frequency, signal_type="guitar", sample_rate=48000):
     }
 
 
+def test_short_buffers(sample_rate=48000):
+    """Buffers too short to hold a peak must report no pitch."""
+    for length in (1, 2):
+        frame = np.sin(np.arange(length)).astype(np.float32)
+        assert mpm_pitch_detection(frame, sample_rate) == (None, None)
+
+
+def test_fft_size_too_small(sample_rate=48000):
+    """An FFT shorter than 2n - 1 would wrap the autocorrelation around."""
+    frame = generate_sine_wave(220, duration=2048 / sample_rate,
+                               sample_rate=sample_rate)
+    try:
+        mpm_pitch_detection(frame, sample_rate, fft_size=2048)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("fft_size=2048 accepted for 2048 samples")
+    mpm_pitch_detection(frame, sample_rate, fft_size=2 * len(frame) - 1)
+
+
+def test_short_audio(sample_rate=48000):
+    """Audio shorter than one frame must yield no frames, not an error."""
+    for length in (1000, 2000):
+        pitches, clarities, times = detect_pitch_mpm(np.zeros(length),
+                                                     sample_rate)
+        assert len(pitches) == len(clarities) == len(times) == 0
+
+
 def run_tests():
     """Run test suite for MPM."""
     print("=" * 70)
@@ -120,6 +155,13 @@ def run_tests():
         print(f"  Cents Offset:    Mean={np.mean(cents):+.2f} cents, "
               f"Std={np.std(cents):.2f} cents")
 
+    test_short_buffers()
+    print("\nShort buffers (1-2 samples): no pitch, as expected")
+    test_short_audio()
+    print("Audio shorter than one frame: no frames, as expected")
+    test_fft_size_too_small()
+    print("fft_size below 2n - 1: rejected, as expected")
+
     print("\n" + "=" * 70)
     print("PASS: All tests completed successfully!")
     print("=" * 70)